@@ -14,13 +14,22 @@
 
 import collections
 import io
-import math
+import mmap
 import os
+import pickle
+import tempfile
+import weakref
 import warnings
 import sys
 import inspect
-from multiprocess import Pool, RLock
-
+import itertools
+import queue
+import threading
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from multiprocess import Pool
+
+import numpy as np
 import paddle.distributed as dist
 from paddle.io import Dataset, IterableDataset
 from paddle.dataset.common import md5file
@@ -28,13 +37,14 @@ from paddle.utils.download import get_path_from_url
 from paddlenlp.utils.env import DATA_HOME
 from typing import Iterable, Iterator, Optional, List, Any, Callable, Union
 import importlib
-from functools import partial
+from functools import lru_cache, partial
 
 __all__ = ['MapDataset', 'DatasetBuilder', 'IterDataset', 'load_dataset']
 
 DATASETS_MODULE_PATH = "paddlenlp.datasets."
 
 
+@lru_cache(maxsize=None)
 def import_main_class(module_path):
     """
     Import a module at module_path and return its DatasetBuilder class.
@@ -42,18 +52,188 @@ def import_main_class(module_path):
     """
     module_path = DATASETS_MODULE_PATH + module_path
     module = importlib.import_module(module_path)
-    main_cls_type = DatasetBuilder
 
     # Find the main class in our imported module
-    module_main_cls = None
-    for name, obj in module.__dict__.items():
-        if isinstance(obj, type) and issubclass(obj, main_cls_type):
-            if name == 'DatasetBuilder':
-                continue
-            module_main_cls = obj
-            break
+    return next((obj for name, obj in vars(module).items()
+                 if isinstance(obj, type) and issubclass(obj, DatasetBuilder)
+                 and name != 'DatasetBuilder'), None)
+
+
+# Read-only state of worker processes of `MapDataset.map` and
+# `MapDataset.filter`, set once per worker by `_init_worker`.
+_WORKER_STATE = {}
+
+
+def _get_num_cpus():
+    """
+    Returns the number of CPUs this process is allowed to run on.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _init_worker(data, fn, batched):
+    """
+    Stores the data and the function in a worker process once at startup, so
+    that tasks only need to carry the range of samples to process. With the
+    `fork` start method, they are inherited without being pickled.
+    """
+    _WORKER_STATE['data'] = data
+    _WORKER_STATE['fn'] = fn
+    _WORKER_STATE['batched'] = batched
+
+
+def _shard_range(num_samples, num_shards, index):
+    """
+    Returns the `[start, end)` range of the `index`-th contiguous shard when
+    splitting `num_samples` samples into `num_shards` pieces.
+    """
+    div = num_samples // num_shards
+    mod = num_samples % num_shards
+    start = div * index + min(index, mod)
+    end = start + div + (1 if index < mod else 0)
+    return start, end
+
+
+def _map_worker(args):
+    """
+    Applies the function of the worker to the samples in range `args`.
+    """
+    data = _slice_data(_WORKER_STATE['data'], *args)
+    fn = _WORKER_STATE['fn']
+    if _WORKER_STATE['batched']:
+        return fn(data)
+    return list(map(fn, data))
+
+
+def _filter_worker(args):
+    """
+    Filters the samples in range `args` by the function of the worker.
+    """
+    fn = _WORKER_STATE['fn']
+    return [
+        example for example in _slice_data(_WORKER_STATE['data'], *args)
+        if fn(example)
+    ]
+
+
+def _iter_data(data):
+    """
+    Returns an iterator over `data`. Sequences and NumPy arrays are iterated
+    directly, while other objects such as `paddle.io.Dataset` may not stop
+    iterating by `IndexError` and are thus iterated by indices.
+    """
+    if isinstance(data, (Sequence, np.ndarray)):
+        return iter(data)
+    return (data[idx] for idx in range(len(data)))
+
+
+def _slice_data(data, start, end, step=1):
+    """
+    Returns `data[start:end:step]`. Objects supporting slices, such as
+    sequences and NumPy arrays, are sliced directly, which keeps e.g. a view
+    of an array. Other objects such as `paddle.io.Dataset` may only support
+    indexing by integers and are thus gathered into a list.
+    """
+    try:
+        return data[start:end:step]
+    except Exception:
+        return [data[idx] for idx in range(start, end, step)]
+
+
+def _get_label_col(example):
+    """
+    Returns the name of the label column of `example`. For now we only allow
+    `label` or `labels` to be the name of label column. Returns None if the
+    example contains neither.
+    """
+    if 'labels' in example:
+        return 'labels'
+    elif 'label' in example:
+        return 'label'
+    return None
+
 
-    return module_main_cls
+def _apply_transforms(fns, data):
+    for fn in fns:
+        data = fn(data)
+    return data
+
+
+def _compose(fns):
+    """
+    Returns a callable which applies the functions in `fns` in order: None if
+    there are none, the function itself if there is one, and a flat loop over
+    them otherwise, so that long chains neither nest calls nor grow the stack.
+    """
+    if not fns:
+        return None
+    if len(fns) == 1:
+        return fns[0]
+    return partial(_apply_transforms, fns)
+
+
+def _concat_shards(shards):
+    """
+    Concatenates the processed shards into a single preallocated list and
+    drops each shard once copied, to keep peak memory low.
+    """
+    data = [None] * sum(map(len, shards))
+    start = 0
+    for i, shard in enumerate(shards):
+        end = start + len(shard)
+        data[start:end] = shard
+        start = end
+        shards[i] = None
+    return data
+
+
+def _prefetch(iterable, buffer_size):
+    """
+    Iterates `iterable` in a background thread and yields its items from a
+    bounded queue holding at most `buffer_size` items, so that producing the
+    next items overlaps with consuming the current one.
+    """
+    buffer = queue.Queue(buffer_size)
+    stop = threading.Event()
+    end = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        error = None
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            error = e
+        finally:
+            # Always send the end marker, so that the consumer never blocks
+            # forever, even if the source raises e.g. `KeyboardInterrupt`.
+            put((end, error))
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is end:
+                break
+            yield item
+    finally:
+        # Let the producer exit if the consumer stops early.
+        stop.set()
 
 
 def load_dataset(path_or_read_func,
@@ -141,6 +321,132 @@ def load_dataset(path_or_read_func,
         return datasets
 
 
+class _ColumnarData(Sequence):
+    """
+    Stores dict samples sharing the same keys as one column per key, and
+    rebuilds the dict of a sample on access. Used by `MapDataset.to_columnar`.
+
+    Args:
+        columns (dict): A dict mapping each key to the column of its values,
+            which could be a list or a 1-D `numpy.ndarray`.
+        length (int): Number of samples.
+    """
+
+    def __init__(self, columns, length):
+        self.columns = columns
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return _ColumnarData(
+                {key: column[idx]
+                 for key, column in self.columns.items()},
+                len(range(self._length)[idx]))
+        idx = range(self._length)[idx]
+        return {key: column[idx] for key, column in self.columns.items()}
+
+    @staticmethod
+    def from_examples(examples):
+        if not isinstance(examples, Sequence):
+            examples = list(_iter_data(examples))
+        keys = list(examples[0].keys()) if len(examples) and isinstance(
+            examples[0], dict) else []
+        for example in examples:
+            if not isinstance(example, dict) or len(example) != len(
+                    keys) or any(key not in example for key in keys):
+                raise ValueError(
+                    "All samples should be dicts with the same keys to be "
+                    "converted into columnar layout.")
+
+        columns = {}
+        for key in keys:
+            column = [example[key] for example in examples]
+            # Numeric columns are stored as arrays to save memory and to allow
+            # vectorized operations on the whole column.
+            if all(type(value) is int for value in column) or all(
+                    type(value) is float for value in column):
+                array = np.asarray(column)
+                if array.dtype.kind in 'iuf':
+                    column = array
+            columns[key] = column
+        return _ColumnarData(columns, len(examples))
+
+
+def _close_memmap_file(buffer, path):
+    if buffer is not None:
+        buffer.close()
+    os.remove(path)
+
+
+class _MemmapFile(object):
+    """
+    Memory-maps a file read-only. If `remove` is True, the file is removed once
+    this object is garbage collected.
+    """
+
+    def __init__(self, path, remove=False):
+        self.path = path
+        self.buffer = None
+        # An empty file can not be memory-mapped, and has nothing to read.
+        if os.path.getsize(path):
+            with open(path, 'rb') as f:
+                self.buffer = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ)
+        if remove:
+            weakref.finalize(self, _close_memmap_file, self.buffer, path)
+
+
+class _MemmapData(Sequence):
+    """
+    Stores pickled samples in a memory-mapped file, and unpickles a sample on
+    access. Used by `MapDataset.memmap`.
+
+    Args:
+        file (_MemmapFile): The memory-mapped file holding pickled samples.
+        starts (numpy.ndarray): Start offset of each sample in the file.
+        ends (numpy.ndarray): End offset of each sample in the file.
+    """
+
+    def __init__(self, file, starts, ends):
+        self.file = file
+        self._starts = starts
+        self._ends = ends
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return _MemmapData(self.file, self._starts[idx], self._ends[idx])
+        idx = range(len(self._starts))[idx]
+        return pickle.loads(self.file.buffer[self._starts[idx]:self._ends[
+            idx]])
+
+    def __getstate__(self):
+        # The memory map is reopened rather than pickled, e.g. when sent to
+        # worker processes. Only the original owner removes the file.
+        return self.file.path, self._starts, self._ends
+
+    def __setstate__(self, state):
+        path, self._starts, self._ends = state
+        self.file = _MemmapFile(path)
+
+    @staticmethod
+    def from_examples(examples, dirname=None):
+        fd, path = tempfile.mkstemp(suffix='.pkl', dir=dirname)
+        offsets = np.zeros(len(examples) + 1, dtype=np.int64)
+        with os.fdopen(fd, 'wb') as f:
+            for i, example in enumerate(_iter_data(examples)):
+                f.write(pickle.dumps(example, protocol=pickle.HIGHEST_PROTOCOL))
+                offsets[i + 1] = f.tell()
+        return _MemmapData(
+            _MemmapFile(
+                path, remove=True), offsets[:-1], offsets[1:])
+
+
 class MapDataset(Dataset):
     """
     Wraps a map-style dataset-like object as an instance of `MapDataset`, and equips it 
@@ -159,24 +465,22 @@ class MapDataset(Dataset):
 
     def __init__(self, data, **kwargs):
         self.data = data
-        self._transform_pipline = []
+        self._transform_pipline = ()
+        # Composition of the lazy transformations, None if there are none.
+        self._composed = None
         self.new_data = self.data
 
         self.label_list = kwargs.pop('label_list', None)
         self.vocab_info = kwargs.pop('vocab_info', None)
 
-    def _transform(self, data):
-        for fn in self._transform_pipline:
-            data = fn(data)
-        return data
-
     def __getitem__(self, idx):
         """
         Basic function of `MapDataset` to get sample from dataset with a given 
         index.
         """
-        return self._transform(self.new_data[
-            idx]) if self._transform_pipline else self.new_data[idx]
+        transform = self._composed
+        data = self.new_data[idx]
+        return data if transform is None else transform(data)
 
     def __len__(self):
         """
@@ -193,40 +497,34 @@ class MapDataset(Dataset):
             fn (callable): A filter function that takes a sample as input and
                 returns a boolean. Samples that return False would be discarded.
             num_workers(int, optional): Number of processes for multiprocessing. If 
-                set to 0, it doesn't use multiprocessing. Defalt: 0.
-        """
-        assert num_workers >= 0, "num_workers should be a non-negative value"
-        if num_workers > 0:
-            with Pool(num_workers, initargs=(RLock(), )) as pool:
-
-                def filter_shard(num_workers, index, fn):
-                    self.shard(
-                        num_shards=num_workers, index=index, contiguous=True)
-                    self._filter(fn=fn)
-                    return self
-
-                kwds_per_shard = [
-                    dict(
-                        num_workers=num_workers, index=rank, fn=fn)
-                    for rank in range(num_workers)
-                ]
-                results = [
-                    pool.apply_async(
-                        filter_shard, kwds=kwds) for kwds in kwds_per_shard
-                ]
-                transformed_shards = [r.get() for r in results]
-
-                self.new_data = []
-                for i in range(num_workers):
-                    self.new_data += transformed_shards[i].new_data
-            return self
+                set to 0, it doesn't use multiprocessing. If set to -1, it uses as 
+                many processes as available CPUs. Defalt: 0.
+        """
+        assert num_workers >= -1, (
+            "num_workers should be a non-negative value or -1")
+        if num_workers != 0:
+            return self._run_workers(_filter_worker, fn, num_workers)
         else:
             return self._filter(fn)
 
+    def _run_workers(self, worker, fn, num_workers, batched=False):
+        if num_workers == -1:
+            num_workers = _get_num_cpus()
+        ranges = [
+            _shard_range(len(self.new_data), num_workers, rank)
+            for rank in range(num_workers)
+        ]
+        with Pool(
+                num_workers,
+                initializer=_init_worker,
+                initargs=(self.new_data, fn, batched)) as pool:
+            transformed_shards = pool.map(worker, ranges)
+        self.new_data = _concat_shards(transformed_shards)
+        return self
+
     def _filter(self, fn):
         self.new_data = [
-            self.new_data[idx] for idx in range(len(self.new_data))
-            if fn(self.new_data[idx])
+            data for data in _iter_data(self.new_data) if fn(data)
         ]
         return self
 
@@ -252,19 +550,16 @@ class MapDataset(Dataset):
             num_shards = dist.get_world_size()
         if index is None:
             index = dist.get_rank()
+        assert 0 <= index < num_shards, (
+            "index should be in the range [0, num_shards)")
 
         if contiguous:
-            div = len(self) // num_shards
-            mod = len(self) % num_shards
-            start = div * index + min(index, mod)
-            end = start + div + (1 if index < mod else 0)
-            self.new_data = self.new_data[start:end]
+            start, end = _shard_range(len(self), num_shards, index)
+            step = 1
         else:
-            num_samples = int(math.ceil(len(self.new_data) * 1.0 / num_shards))
-            self.new_data = [
-                self.new_data[idx] for idx in range(len(self.new_data))
-                if idx % num_shards == index
-            ]
+            start, end, step = index, len(self.new_data), num_shards
+
+        self.new_data = _slice_data(self.new_data, start, end, step)
 
         return self
 
@@ -284,37 +579,14 @@ class MapDataset(Dataset):
                 True, `lazy` option would be ignored. Defalt: False.
             num_workers(int, optional): Number of processes for multiprocessing. If 
                 set to 0, it doesn't use multiprocessing. Note that if set to positive
-                value, `lazy` option would be ignored. Defalt: 0.
+                value, `lazy` option would be ignored. If set to -1, it uses as many
+                processes as available CPUs. Defalt: 0.
         """
 
-        assert num_workers >= 0, "num_workers should be a non-negative value"
-        if num_workers > 0:
-            with Pool(num_workers, initargs=(RLock(), )) as pool:
-
-                def map_shard(num_workers, index, fn, batched):
-                    self.shard(
-                        num_shards=num_workers, index=index, contiguous=True)
-                    self._map(fn=fn, lazy=False, batched=batched)
-                    return self
-
-                kwds_per_shard = [
-                    dict(
-                        num_workers=num_workers,
-                        index=rank,
-                        fn=fn,
-                        batched=batched) for rank in range(num_workers)
-                ]
-                results = [
-                    pool.apply_async(
-                        map_shard, kwds=kwds) for kwds in kwds_per_shard
-                ]
-                transformed_shards = [r.get() for r in results]
-
-                self.new_data = []
-                for i in range(num_workers):
-                    self.new_data += transformed_shards[i].new_data
-
-            return self
+        assert num_workers >= -1, (
+            "num_workers should be a non-negative value or -1")
+        if num_workers != 0:
+            return self._run_workers(_map_worker, fn, num_workers, batched)
         else:
             return self._map(fn, lazy=lazy, batched=batched)
 
@@ -322,11 +594,97 @@ class MapDataset(Dataset):
         if batched:
             self.new_data = fn(self.new_data)
         elif lazy:
-            self._transform_pipline.append(fn)
+            self._transform_pipline += (fn, )
+            self._composed = _compose(self._transform_pipline)
         else:
-            self.new_data = [
-                fn(self.new_data[idx]) for idx in range(len(self.new_data))
-            ]
+            self.new_data = list(map(fn, _iter_data(self.new_data)))
+        return self
+
+    def prefetch(self, buffer_size=2, num_workers=1):
+        """
+        Returns an `IterDataset` which yields samples of this dataset in order,
+        while a thread pool computes up to `buffer_size` following samples
+        (including lazy transformations) ahead of time.
+
+        Args:
+            buffer_size (int, optional): Number of samples to compute ahead.
+                Default: 2.
+            num_workers (int, optional): Number of threads used to compute
+                samples. Default: 1.
+        """
+        assert buffer_size > 0, "buffer_size should be a positive value"
+        assert num_workers > 0, "num_workers should be a positive value"
+
+        def generate_examples():
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                futures = collections.deque()
+                for idx in range(len(self)):
+                    futures.append(executor.submit(self.__getitem__, idx))
+                    if len(futures) > buffer_size:
+                        yield futures.popleft().result()
+                while futures:
+                    yield futures.popleft().result()
+
+        return IterDataset(
+            generate_examples,
+            label_list=self.label_list,
+            vocab_info=self.vocab_info)
+
+    def to_columnar(self):
+        """
+        Converts samples into a columnar layout which stores one column per key
+        instead of one dict per sample, to reduce memory usage. Samples should
+        be dicts sharing the same keys. Integer and float columns are stored as
+        `numpy.ndarray`, so their values are returned as NumPy scalars.
+        Columns are accessible via `new_data.columns`.
+
+        Samples are rebuilt as new dicts on access, so modifying a returned
+        sample doesn't change the dataset.
+
+        The raw samples in `data` are converted as well so that the original
+        dicts are released. If `data` holds different samples than
+        `new_data` and they can not be converted, `data` is kept as is and
+        should be dropped by the caller to save memory.
+        """
+        if not isinstance(self.new_data, _ColumnarData):
+            shared = self.data is self.new_data
+            self.new_data = _ColumnarData.from_examples(self.new_data)
+            if shared:
+                self.data = self.new_data
+            elif not isinstance(self.data, _ColumnarData):
+                try:
+                    self.data = _ColumnarData.from_examples(self.data)
+                except ValueError:
+                    pass
+        return self
+
+    def memmap(self, dirname=None):
+        """
+        Pickles samples into a temporary file and memory-maps it, so that
+        samples are loaded from the file on access instead of being kept in
+        memory as Python objects. Pages of the file are shared through the OS
+        page cache by all processes, such as forked `DataLoader` workers,
+        rather than being copied when reference counts change. The file is
+        removed once the data is garbage collected.
+
+        Samples are rebuilt on access, so modifying a returned sample doesn't
+        change the dataset.
+
+        The raw samples in `data` are memory-mapped as well so that the
+        original objects are released. If `data` is the same object as
+        `new_data`, both share a single file.
+
+        Args:
+            dirname (str, optional): Directory to create the temporary file in.
+                If None, the default temporary directory is used. Default: None.
+        """
+        if not isinstance(self.new_data, _MemmapData):
+            shared = self.data is self.new_data
+            self.new_data = _MemmapData.from_examples(self.new_data, dirname)
+            if shared:
+                self.data = self.new_data
+            elif not isinstance(self.data, _MemmapData):
+                self.data = _MemmapData.from_examples(self.data, dirname)
         return self
 
 
@@ -347,20 +705,16 @@ class IterDataset(IterableDataset):
 
     def __init__(self, data, **kwargs):
         self.data = data
-        self._transform_pipline = []
-        self._filter_pipline = []
+        self._transform_pipline = ()
+        # Composition of the transformations, None if there are none.
+        self._composed = None
+        self._filter_pipline = ()
+        # `(num_shards, index)` set by `shard`, None if not sharded.
+        self._shard_stride = None
 
         self.label_list = kwargs.pop('label_list', None)
         self.vocab_info = kwargs.pop('vocab_info', None)
 
-    def _transform(self, data):
-        for fn in self._transform_pipline:
-            data = fn(data)
-        return data
-
-    def _shard_filter(self, num_samples):
-        return True
-
     def _filter(self, data):
         for fn in self._filter_pipline:
             if not fn(data):
@@ -371,27 +725,40 @@ class IterDataset(IterableDataset):
         """
         yields sample sequentially.
         """
-        num_samples = 0
         if inspect.isfunction(self.data):
-            for example in self.data():
-                if (not self._filter_pipline or
-                        self._filter(self._filter_pipline)
-                    ) and self._shard_filter(num_samples=num_samples):
-                    yield self._transform(
-                        example) if self._transform_pipline else example
-                num_samples += 1
+            source = self.data()
         else:
             if inspect.isgenerator(self.data):
                 warnings.warn(
                     'Reciving generator as data source, data can only be iterated once'
                 )
-            for example in self.data:
-                if (not self._filter_pipline or
-                        self._filter(self._filter_pipline)
-                    ) and self._shard_filter(num_samples=num_samples):
-                    yield self._transform(
-                        example) if self._transform_pipline else example
-                num_samples += 1
+            source = self.data
+
+        if self._shard_stride is not None:
+            num_shards, index = self._shard_stride
+            source = itertools.islice(source, index, None, num_shards)
+
+        # Resolve filters and transformations once, and dispatch to a loop
+        # specialized for them, to keep per-sample work minimal.
+        transform = self._composed
+        if not self._filter_pipline:
+            if transform is None:
+                for example in source:
+                    yield example
+            else:
+                for example in source:
+                    yield transform(example)
+        else:
+            keep = self._filter_pipline[0] if len(
+                self._filter_pipline) == 1 else self._filter
+            if transform is None:
+                for example in source:
+                    if keep(example):
+                        yield example
+            else:
+                for example in source:
+                    if keep(example):
+                        yield transform(example)
 
     def filter(self, fn):
         """
@@ -403,7 +770,7 @@ class IterDataset(IterableDataset):
                 returns a boolean. Samples that return False are discarded.
         """
 
-        self._filter_pipline.append(fn)
+        self._filter_pipline += (fn, )
 
         return self
 
@@ -423,15 +790,10 @@ class IterDataset(IterableDataset):
             num_shards = dist.get_world_size()
         if index is None:
             index = dist.get_rank()
+        assert 0 <= index < num_shards, (
+            "index should be in the range [0, num_shards)")
 
-        def sharder(num_shards, index, num_samples):
-            if num_samples % num_shards == index:
-                return True
-            else:
-                return False
-
-        fn = partial(sharder, num_shards=num_shards, index=index)
-        self._shard_filter = fn
+        self._shard_stride = (num_shards, index)
         return self
 
     def map(self, fn):
@@ -443,10 +805,59 @@ class IterDataset(IterableDataset):
                 sample as argument.
         """
 
-        self._transform_pipline.append(fn)
+        self._transform_pipline += (fn, )
+        self._composed = _compose(self._transform_pipline)
 
         return self
 
+    def prefetch(self, buffer_size=2):
+        """
+        Returns a new `IterDataset` which iterates this dataset in a background
+        thread and keeps up to `buffer_size` samples ready, so that reading and
+        transforming samples overlaps with consuming them. Since samples are
+        buffered as they are yielded by this dataset, call it after `map`,
+        `filter` and `shard`.
+
+        Args:
+            buffer_size (int, optional): Maximum number of samples to buffer.
+                Default: 2.
+        """
+        assert buffer_size > 0, "buffer_size should be a positive value"
+
+        def generate_examples():
+            for example in _prefetch(self, buffer_size):
+                yield example
+
+        return IterDataset(
+            generate_examples,
+            label_list=self.label_list,
+            vocab_info=self.vocab_info)
+
+    def batched(self, batch_size):
+        """
+        Returns a new `IterDataset` which yields lists of `batch_size` samples
+        of this dataset, so that functions registered by `map` on it receive
+        and can process a whole batch at once. The last batch may contain
+        fewer samples.
+
+        Args:
+            batch_size (int): Number of samples in each batch.
+        """
+        assert batch_size > 0, "batch_size should be a positive value"
+
+        def generate_batches():
+            examples = iter(self)
+            while True:
+                batch = list(itertools.islice(examples, batch_size))
+                if not batch:
+                    return
+                yield batch
+
+        return IterDataset(
+            generate_batches,
+            label_list=self.label_list,
+            vocab_info=self.vocab_info)
+
 
 class DatasetBuilder:
     """
@@ -535,52 +946,64 @@ class DatasetBuilder:
         label_list = self.get_labels()
         vocab_info = self.get_vocab()
 
+        # Whether `_read` accepts the split name besides the filename. It is
+        # worked out on first use, since subclasses may not call `__init__`.
+        read_takes_split = getattr(self, '_read_takes_split', None)
+        if read_takes_split is None:
+            read_takes_split = self._read_takes_split = len([
+                param
+                for param in inspect.signature(self._read).parameters.values()
+                if param.kind in (param.POSITIONAL_ONLY,
+                                  param.POSITIONAL_OR_KEYWORD)
+            ]) > 1
+        read_examples = partial(
+            self._read, filename,
+            split) if read_takes_split else partial(self._read, filename)
+
+        if label_list is not None:
+            label_dict = {label: i for i, label in enumerate(label_list)}
+            get_label_id = label_dict.__getitem__
+
         if self.lazy:
 
             def generate_examples():
-                generator = self._read(
-                    filename, split
-                ) if self._read.__code__.co_argcount > 2 else self._read(
-                    filename)
-                for example in generator:
-                    # We need to check if the example contains label column and confirm its name.
-                    # For now we only allow `label` or `labels` to be the name of label column.
-                    if 'labels' in example.keys():
-                        label_col = 'labels'
-                    elif 'label' in example.keys():
-                        label_col = 'label'
-                    else:
-                        label_col = None
+                examples = iter(read_examples())
+                try:
+                    first = next(examples)
+                except StopIteration:
+                    return
+                # The label column is determined by the first example.
+                label_col = _get_label_col(first)
+                examples = itertools.chain([first], examples)
+
+                if label_list is None or label_col is None:
+                    for example in examples:
+                        yield example
+                    return
 
+                for example in examples:
                     # Convert class label to label ids.
-                    if label_list is not None and example.get(label_col, None):
-                        label_dict = {}
-                        for i, label in enumerate(label_list):
-                            label_dict[label] = i
-                        if isinstance(example[label_col], list) or isinstance(
-                                example[label_col], tuple):
-                            for label_idx in range(len(example[label_col])):
-                                example[label_col][label_idx] = label_dict[
-                                    example[label_col][label_idx]]
+                    labels = example.get(label_col, None)
+                    if labels:
+                        if isinstance(labels, (list, tuple)):
+                            example[label_col] = [
+                                get_label_id(label) for label in labels
+                            ]
                         else:
-                            example[label_col] = label_dict[example[label_col]]
-
-                        yield example
-                    else:
-                        yield example
+                            example[label_col] = get_label_id(labels)
+                    yield example
 
             return IterDataset(
                 generate_examples(),
                 label_list=label_list,
                 vocab_info=vocab_info)
         else:
-            examples = self._read(
-                filename,
-                split) if self._read.__code__.co_argcount > 2 else self._read(
-                    filename)
+            examples = read_examples()
 
-            # Then some validation.
-            if not isinstance(examples, list):
+            # Then some validation. Tuples are kept as is to avoid a copy, and
+            # `list()` presizes itself from `__length_hint__` when the
+            # iterable provides one.
+            if not isinstance(examples, (list, tuple)):
                 examples = list(examples)
 
             if not examples:
@@ -588,29 +1011,18 @@ class DatasetBuilder:
                     "No instances were read from the given filepath {}. "
                     "Is the path correct?".format(filename))
 
-            # We need to check if the example contains label column and confirm its name.
-            # For now we only allow `label` or `labels` to be the name of label column.
-            if 'labels' in examples[0].keys():
-                label_col = 'labels'
-            elif 'label' in examples[0].keys():
-                label_col = 'label'
-            else:
-                label_col = None
+            label_col = _get_label_col(examples[0])
 
             # Convert class label to label ids.
             if label_list is not None and examples[0].get(label_col, None):
-                label_dict = {}
-                for i, label in enumerate(label_list):
-                    label_dict[label] = i
-                for idx in range(len(examples)):
-                    if isinstance(examples[idx][label_col], list) or isinstance(
-                            examples[idx][label_col], tuple):
-                        for label_idx in range(len(examples[idx][label_col])):
-                            examples[idx][label_col][label_idx] = label_dict[
-                                examples[idx][label_col][label_idx]]
+                for example in examples:
+                    labels = example[label_col]
+                    if isinstance(labels, (list, tuple)):
+                        example[label_col] = [
+                            get_label_id(label) for label in labels
+                        ]
                     else:
-                        examples[idx][label_col] = label_dict[examples[idx][
-                            label_col]]
+                        example[label_col] = get_label_id(labels)
 
             return MapDataset(
                 examples, label_list=label_list, vocab_info=vocab_info)
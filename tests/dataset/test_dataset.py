@@ -0,0 +1,585 @@
+# Copyright (c) 2021 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import gc
+import os
+import tempfile
+import unittest
+import weakref
+
+import numpy as np
+from paddlenlp.datasets import (DatasetBuilder, IterDataset, MapDataset,
+                                load_dataset)
+
+from common_test import CpuCommonTest
+import util
+
+
+class Sample(dict):
+    """
+    A dict which supports weak references, to check samples are released.
+    """
+    pass
+
+
+def get_examples(num_examples=10):
+    return [
+        Sample(
+            id=i, text='text' + str(i)) for i in range(num_examples)
+    ]
+
+
+def generate_numbers():
+    for i in range(10):
+        yield i
+
+
+def generate_with_error():
+    yield 0
+    yield 1
+    raise KeyError('error in reading data')
+
+
+def generate_with_interrupt():
+    yield 0
+    raise KeyboardInterrupt
+
+
+def read_lines(data_files):
+    with open(data_files, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield {'text': line.rstrip('\n')}
+
+
+class SplitBuilder(DatasetBuilder):
+    SPLITS = {'train': 'train.txt', 'dev': 'dev.txt'}
+
+    def _read(self, filename, split):
+        for i in range(3):
+            yield {'text': filename, 'split': split, 'id': i}
+
+
+class NoSplitBuilder(DatasetBuilder):
+    SPLITS = {'train': 'train.txt'}
+
+    def _read(self, filename, *args):
+        for i in range(3):
+            yield {'text': filename, 'id': i}
+
+
+class NoSuperBuilder(SplitBuilder):
+    def __init__(self, lazy):
+        self.lazy = lazy
+
+
+class LabelBuilder(DatasetBuilder):
+    def __init__(self, examples, label_list, **kwargs):
+        super(LabelBuilder, self).__init__(**kwargs)
+        self.examples = examples
+        self.label_list = label_list
+
+    def _read(self, filename):
+        for example in self.examples:
+            yield dict(example)
+
+    def get_labels(self):
+        return self.label_list
+
+
+class TestLabelConversion(CpuCommonTest):
+    def read_labels(self, examples, label_list, label_col='label'):
+        return [
+            example[label_col]
+            for example in LabelBuilder(
+                examples, label_list, lazy=False).read('')
+        ]
+
+    def test_str_labels(self):
+        labels = self.read_labels([{
+            'label': 'pos'
+        }, {
+            'label': 'neg'
+        }], ['neg', 'pos'])
+        self.check_output_equal(labels, [1, 0])
+
+    def test_int_labels(self):
+        labels = self.read_labels([{
+            'label': 1
+        }, {
+            'label': 2
+        }, {
+            'label': 0
+        }], [2, 0, 1])
+        self.check_output_equal(labels, [2, 0, 1])
+
+    def test_int_list_labels(self):
+        labels = self.read_labels([{
+            'labels': [1, 2]
+        }, {
+            'labels': (0, )
+        }, {
+            'labels': []
+        }], [2, 0, 1], 'labels')
+        self.assertEqual(labels, [[2, 0], [1], []])
+
+    def test_mixed_scalar_and_list_labels(self):
+        labels = self.read_labels([{
+            'label': 1
+        }, {
+            'label': [1, 0]
+        }], [1, 0])
+        self.assertEqual(labels, [0, [0, 1]])
+        labels = self.read_labels([{
+            'label': [1, 0]
+        }, {
+            'label': 1
+        }], [1, 0])
+        self.assertEqual(labels, [[0, 1], 0])
+
+    @util.assert_raises(KeyError)
+    def test_unknown_label(self):
+        self.read_labels([{'label': 1}, {'label': 5}], [1, 0])
+
+
+class TestLazyLabelConversion(CpuCommonTest):
+    def read_examples(self, examples, label_list):
+        ds = LabelBuilder(examples, label_list, lazy=True).read('')
+        self.assertIsInstance(ds, IterDataset)
+        return list(ds)
+
+    def test_empty(self):
+        self.check_output_equal(len(self.read_examples([], [0, 1])), 0)
+
+    def test_scalar_labels(self):
+        examples = self.read_examples([{
+            'label': 'pos'
+        }, {
+            'label': 'neg'
+        }, {
+            'label': 'pos'
+        }], ['neg', 'pos'])
+        self.check_output_equal([example['label'] for example in examples],
+                                [1, 0, 1])
+
+    def test_list_labels(self):
+        examples = self.read_examples([{
+            'labels': [1, 2]
+        }, {
+            'labels': (0, )
+        }, {
+            'labels': []
+        }], [2, 0, 1])
+        self.assertEqual([example['labels'] for example in examples],
+                         [[2, 0], [1], []])
+
+    def test_label_col_from_first_example(self):
+        examples = self.read_examples([{
+            'label': 'pos'
+        }, {
+            'label': 'neg',
+            'labels': ['pos']
+        }], ['neg', 'pos'])
+        self.assertEqual(examples, [{
+            'label': 1
+        }, {
+            'label': 0,
+            'labels': ['pos']
+        }])
+
+
+class TestLoadDataset(CpuCommonTest):
+    def setUp(self):
+        fd, self.data_file = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join('line' + str(i) for i in range(5)) + '\n')
+
+    def tearDown(self):
+        os.remove(self.data_file)
+
+    def test_read_func_eager(self):
+        ds = load_dataset(read_lines, data_files=self.data_file, lazy=False)
+        self.assertIsInstance(ds, MapDataset)
+        self.check_output_equal(len(ds), 5)
+        self.check_output_equal(ds[3]['text'], 'line3')
+
+    def test_read_func_lazy(self):
+        ds = load_dataset(read_lines, data_files=self.data_file, lazy=True)
+        self.assertIsInstance(ds, IterDataset)
+        self.check_output_equal([example['text'] for example in ds],
+                                ['line' + str(i) for i in range(5)])
+
+    def test_builder_split(self):
+        for lazy in [False, True]:
+            ds = SplitBuilder(lazy=lazy).read('dev.txt', split='dev')
+            examples = list(ds)
+            self.check_output_equal(len(examples), 3)
+            self.check_output_equal(examples[0]['text'], 'dev.txt')
+            self.check_output_equal(examples[0]['split'], 'dev')
+
+    def test_builder_no_split(self):
+        for lazy in [False, True]:
+            ds = NoSplitBuilder(lazy=lazy).read('train.txt', split='train')
+            examples = list(ds)
+            self.check_output_equal(len(examples), 3)
+            self.check_output_equal(examples[2]['text'], 'train.txt')
+            self.check_output_equal(examples[2]['id'], 2)
+
+    def test_builder_without_super_init(self):
+        for lazy in [False, True]:
+            ds = NoSuperBuilder(lazy=lazy).read('dev.txt', split='dev')
+            examples = list(ds)
+            self.check_output_equal(len(examples), 3)
+            self.check_output_equal(examples[0]['split'], 'dev')
+
+
+class IndexedData(object):
+    """
+    A dataset which only supports indexing by integers, like a subclass of
+    `paddle.io.Dataset`.
+    """
+
+    def __init__(self, num_examples):
+        self.num_examples = num_examples
+
+    def __getitem__(self, idx):
+        if not isinstance(idx, int):
+            raise TypeError('Only integer indices are supported.')
+        return idx
+
+    def __len__(self):
+        return self.num_examples
+
+
+class TestMapDataset(CpuCommonTest):
+    def test_filter(self):
+        ds = MapDataset(list(range(10))).filter(lambda x: x % 2 == 0)
+        self.check_output_equal(ds.new_data, [0, 2, 4, 6, 8])
+
+    def test_shard(self):
+        for index in range(3):
+            ds = MapDataset(list(range(10))).shard(num_shards=3, index=index)
+            self.check_output_equal(ds.new_data, list(range(index, 10, 3)))
+
+    def test_contiguous_shard(self):
+        expected = [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+        for index in range(3):
+            ds = MapDataset(list(range(10))).shard(
+                num_shards=3, index=index, contiguous=True)
+            self.check_output_equal(ds.new_data, expected[index])
+
+    def test_shard_indexed_data(self):
+        ds = MapDataset(IndexedData(10)).shard(num_shards=3, index=1)
+        self.check_output_equal(ds.new_data, [1, 4, 7])
+        ds = MapDataset(IndexedData(10)).shard(
+            num_shards=3, index=2, contiguous=True)
+        self.check_output_equal(ds.new_data, [7, 8, 9])
+
+    def test_shard_ndarray(self):
+        data = np.arange(10)
+        ds = MapDataset(data).shard(num_shards=3, index=2, contiguous=True)
+        self.assertIsInstance(ds.new_data, np.ndarray)
+        self.assertTrue(np.shares_memory(ds.new_data, data))
+        self.check_output_equal(ds.new_data, np.array([7, 8, 9]))
+        ds = MapDataset(np.arange(10)).shard(num_shards=3, index=1)
+        self.check_output_equal(ds.new_data, np.array([1, 4, 7]))
+
+    @util.assert_raises(AssertionError)
+    def test_shard_index_out_of_range(self):
+        MapDataset(list(range(10))).shard(num_shards=2, index=3)
+
+    def test_filter_shard_map(self):
+        ds = MapDataset(list(range(20))).filter(lambda x: x % 2 == 0).shard(
+            num_shards=2, index=1).map(lambda x: x + 1).map(lambda x: x * 10)
+        self.check_output_equal([ds[i] for i in range(len(ds))],
+                                [30, 70, 110, 150, 190])
+
+    def test_eager_map(self):
+        ds = MapDataset(list(range(5))).map(lambda x: x * 2, lazy=False)
+        self.check_output_equal(ds.new_data, [0, 2, 4, 6, 8])
+        ds = MapDataset(IndexedData(5)).map(lambda x: x * 2, lazy=False)
+        self.check_output_equal(ds.new_data, [0, 2, 4, 6, 8])
+
+    def test_many_lazy_maps(self):
+        ds = MapDataset(list(range(3)))
+        for _ in range(5000):
+            ds.map(lambda x: x + 1)
+        self.check_output_equal([ds[i] for i in range(len(ds))],
+                                [5000, 5001, 5002])
+
+
+class TestMapDatasetMultiprocess(CpuCommonTest):
+    def test_map(self):
+        for num_workers in [1, 2, 3, -1]:
+            ds = MapDataset(list(range(10))).map(
+                lambda x: x * 2, num_workers=num_workers)
+            self.check_output_equal(ds.new_data, list(range(0, 20, 2)))
+
+    def test_batched_map(self):
+        ds = MapDataset(list(range(10))).map(
+            lambda examples: [sum(examples)] * len(examples),
+            batched=True,
+            num_workers=2)
+        self.check_output_equal(ds.new_data, [10] * 5 + [35] * 5)
+
+    def test_filter(self):
+        for num_workers in [1, 2, 3, -1]:
+            ds = MapDataset(list(range(10))).filter(
+                lambda x: x % 3 == 0, num_workers=num_workers)
+            self.check_output_equal(ds.new_data, [0, 3, 6, 9])
+
+    def test_same_as_single_process(self):
+        examples = get_examples(50)
+        fn = lambda x: {'id': x['id'] + 1, 'text': x['text'].upper()}
+        ds = MapDataset(examples).map(fn, num_workers=4)
+        expected = MapDataset(examples).map(fn, lazy=False)
+        self.assertEqual(ds.new_data, expected.new_data)
+
+    def test_more_workers_than_samples(self):
+        ds = MapDataset(list(range(3))).map(lambda x: -x, num_workers=5)
+        self.check_output_equal(ds.new_data, [0, -1, -2])
+
+    def test_indexed_data(self):
+        ds = MapDataset(IndexedData(10)).map(lambda x: x + 1, num_workers=2)
+        self.check_output_equal(ds.new_data, list(range(1, 11)))
+        ds = MapDataset(IndexedData(10)).filter(
+            lambda x: x % 2 == 1, num_workers=2)
+        self.check_output_equal(ds.new_data, [1, 3, 5, 7, 9])
+
+    @util.assert_raises(AssertionError)
+    def test_invalid_num_workers(self):
+        MapDataset(list(range(10))).map(lambda x: x, num_workers=-2)
+
+
+class TestIterDatasetFilter(CpuCommonTest):
+    def test_filter(self):
+        ds = IterDataset(generate_numbers).filter(lambda x: x % 2 == 0)
+        self.check_output_equal(list(ds), [0, 2, 4, 6, 8])
+
+    def test_multiple_filters(self):
+        ds = IterDataset(generate_numbers).filter(lambda x: x % 2 == 0).filter(
+            lambda x: x > 3)
+        self.check_output_equal(list(ds), [4, 6, 8])
+
+    def test_filter_before_map(self):
+        mapped = []
+
+        def record(x):
+            mapped.append(x)
+            return x * 10
+
+        ds = IterDataset(list(range(10))).map(record).filter(
+            lambda x: x % 3 == 0)
+        self.check_output_equal(list(ds), [0, 30, 60, 90])
+        self.check_output_equal(mapped, [0, 3, 6, 9])
+
+    def test_map_order(self):
+        ds = IterDataset(generate_numbers).map(lambda x: x + 1).map(
+            lambda x: x * 2)
+        self.check_output_equal(list(ds), list(range(2, 22, 2)))
+
+    def test_many_maps(self):
+        ds = IterDataset(generate_numbers)
+        for _ in range(5000):
+            ds.map(lambda x: x + 1)
+        self.check_output_equal(list(ds), list(range(5000, 5010)))
+
+
+class TestIterDatasetShard(CpuCommonTest):
+    def test_shard(self):
+        for index in range(3):
+            ds = IterDataset(generate_numbers).shard(num_shards=3, index=index)
+            self.check_output_equal(list(ds), list(range(index, 10, 3)))
+
+    def test_shard_before_filter(self):
+        # Shards are taken from the raw stream, so that every sample belongs
+        # to exactly one shard no matter how samples are filtered.
+        ds = IterDataset(generate_numbers).filter(lambda x: x % 2 == 0).shard(
+            num_shards=2, index=0)
+        self.check_output_equal(list(ds), [0, 2, 4, 6, 8])
+        ds = IterDataset(generate_numbers).filter(lambda x: x % 2 == 0).shard(
+            num_shards=2, index=1)
+        self.check_output_equal(len(list(ds)), 0)
+
+    def test_shard_filter_map(self):
+        ds = IterDataset(generate_numbers).shard(
+            num_shards=3, index=1).filter(lambda x: x > 1).map(lambda x: -x)
+        self.check_output_equal(list(ds), [-4, -7])
+
+    def test_more_shards_than_samples(self):
+        ds = IterDataset(generate_numbers).shard(num_shards=20, index=15)
+        self.check_output_equal(len(list(ds)), 0)
+
+    @util.assert_raises(AssertionError)
+    def test_index_out_of_range(self):
+        IterDataset(generate_numbers).shard(num_shards=2, index=3)
+
+
+class TestIterDatasetBatched(CpuCommonTest):
+    def test_tail_batch(self):
+        batches = list(IterDataset(generate_numbers).batched(4))
+        self.check_output_equal(len(batches), 3)
+        self.check_output_equal(batches[0], [0, 1, 2, 3])
+        self.check_output_equal(batches[1], [4, 5, 6, 7])
+        self.check_output_equal(batches[2], [8, 9])
+
+    def test_even_batches(self):
+        batches = list(IterDataset(generate_numbers).batched(5))
+        self.check_output_equal(len(batches), 2)
+        self.check_output_equal(batches[1], [5, 6, 7, 8, 9])
+
+    def test_large_batch(self):
+        batches = list(IterDataset(generate_numbers).batched(20))
+        self.check_output_equal(len(batches), 1)
+        self.check_output_equal(batches[0], list(range(10)))
+
+    def test_map_on_batches(self):
+        ds = IterDataset(generate_numbers).filter(lambda x: x > 2).batched(
+            3).map(sum)
+        self.check_output_equal(list(ds), [12, 21, 9])
+        self.check_output_equal(list(ds), [12, 21, 9])
+
+    @util.assert_raises(AssertionError)
+    def test_invalid_batch_size(self):
+        IterDataset(generate_numbers).batched(0)
+
+
+class TestPrefetch(CpuCommonTest):
+    def test_iter_dataset_order(self):
+        ds = IterDataset(generate_numbers).map(lambda x: x * 2)
+        for buffer_size in [1, 3, 20]:
+            self.check_output_equal(
+                list(ds.prefetch(buffer_size)), list(range(0, 20, 2)))
+
+    def test_iter_dataset_reiterate(self):
+        ds = IterDataset(generate_numbers).prefetch()
+        self.check_output_equal(list(ds), list(range(10)))
+        self.check_output_equal(list(ds), list(range(10)))
+
+    def test_iter_dataset_early_stop(self):
+        ds = IterDataset(generate_numbers).prefetch(1)
+        for example in ds:
+            break
+        self.check_output_equal(example, 0)
+
+    def test_iter_dataset_error(self):
+        ds = IterDataset(generate_with_error).prefetch()
+        examples = []
+        with self.assertRaises(KeyError):
+            for example in ds:
+                examples.append(example)
+        self.check_output_equal(examples, [0, 1])
+
+    def test_iter_dataset_interrupt(self):
+        ds = IterDataset(generate_with_interrupt).prefetch()
+        with self.assertRaises(KeyboardInterrupt):
+            list(ds)
+
+    def test_map_dataset_order(self):
+        ds = MapDataset(list(range(10))).map(lambda x: x * 2)
+        for num_workers in [1, 4]:
+            self.check_output_equal(
+                list(ds.prefetch(
+                    buffer_size=3, num_workers=num_workers)),
+                list(range(0, 20, 2)))
+
+    def test_map_dataset_error(self):
+        ds = MapDataset([{'label': 0}, {}]).map(lambda x: x['label'])
+        with self.assertRaises(KeyError):
+            list(ds.prefetch())
+
+
+class TestMapDatasetToColumnar(CpuCommonTest):
+    def test_round_trip(self):
+        examples = get_examples()
+        ds = MapDataset(examples).to_columnar()
+        self.check_output_equal(len(ds), len(examples))
+        self.check_output_equal(ds.new_data.columns['id'],
+                                np.arange(len(examples)))
+        self.check_output_equal(ds.new_data.columns['text'],
+                                [example['text'] for example in examples])
+        for i in range(len(examples)):
+            self.assertEqual(ds[i], examples[i])
+        self.assertEqual(ds[-1], examples[-1])
+        self.assertEqual(list(ds.shard(3, 1)), examples[1::3])
+
+    def test_filter_and_map(self):
+        ds = MapDataset(get_examples()).to_columnar()
+        ds.filter(lambda x: x['id'] % 2 == 0).map(lambda x: x['text'])
+        self.check_output_equal([ds[i] for i in range(len(ds))],
+                                ['text0', 'text2', 'text4', 'text6', 'text8'])
+
+    def test_release_samples(self):
+        examples = get_examples(100)
+        refs = [weakref.ref(example) for example in examples]
+        ds = MapDataset(examples).to_columnar()
+        del examples
+        gc.collect()
+        self.assertTrue(all(ref() is None for ref in refs))
+        self.assertIs(ds.data, ds.new_data)
+
+    @util.assert_raises(ValueError)
+    def test_different_keys(self):
+        MapDataset([{'id': 0}, {'text': 'text1'}]).to_columnar()
+
+
+class TestMapDatasetMemmap(CpuCommonTest):
+    def test_round_trip(self):
+        examples = get_examples()
+        ds = MapDataset(examples).memmap()
+        self.check_output_equal(len(ds), len(examples))
+        for i in range(len(examples)):
+            self.assertEqual(ds[i], examples[i])
+        self.assertEqual(ds[-1], examples[-1])
+        self.assertEqual(list(ds.shard(3, 1)), examples[1::3])
+
+    def test_filter_and_map(self):
+        ds = MapDataset(get_examples()).memmap()
+        ds.filter(lambda x: x['id'] % 2 == 0).map(lambda x: x['id'])
+        self.check_output_equal([ds[i] for i in range(len(ds))],
+                                [0, 2, 4, 6, 8])
+
+    def test_release_samples(self):
+        examples = get_examples(100)
+        refs = [weakref.ref(example) for example in examples]
+        ds = MapDataset(examples).memmap()
+        del examples
+        gc.collect()
+        self.assertTrue(all(ref() is None for ref in refs))
+        self.assertIs(ds.data, ds.new_data)
+        self.check_output_equal(ds[99]['id'], 99)
+
+    def test_release_raw_data(self):
+        examples = get_examples(100)
+        refs = [weakref.ref(example) for example in examples]
+        ds = MapDataset(examples).map(lambda x: x['id'], lazy=False).memmap()
+        del examples
+        gc.collect()
+        self.assertTrue(all(ref() is None for ref in refs))
+        self.check_output_equal(ds.data[99]['id'], 99)
+        self.check_output_equal(ds[99], 99)
+
+    def test_remove_file(self):
+        ds = MapDataset(get_examples()).memmap()
+        path = ds.new_data.file.path
+        self.assertTrue(os.path.exists(path))
+        del ds
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
+
+    def test_empty(self):
+        ds = MapDataset([]).memmap()
+        self.check_output_equal(len(ds), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()